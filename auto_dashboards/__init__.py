@@ -16,20 +16,28 @@
 #
 
 import json
+from functools import lru_cache
 from pathlib import Path
 
+from . import profiling
 from .handlers import setup_handlers
+from .process_manager import DashboardManager
+
+profiling.record_import("import auto_dashboards")
 
 HERE = Path(__file__).parent.resolve()
 
-with (HERE / "labextension" / "package.json").open() as fid:
-    data = json.load(fid)
+
+@lru_cache(maxsize=None)
+def _labextension_data():
+    with (HERE / "labextension" / "package.json").open() as fid:
+        return json.load(fid)
 
 
 def _jupyter_labextension_paths():
     return [{
         "src": "labextension",
-        "dest": data["name"]
+        "dest": _labextension_data()["name"]
     }]
 
 
@@ -48,8 +56,14 @@ def _load_jupyter_server_extension(server_app):
     server_app: jupyterlab.labapp.LabApp
         JupyterLab application instance
     """
-    setup_handlers(server_app.web_app)
-    server_app.log.info("Registered {name} server extension".format(**data))
+    with profiling.timed("register handlers"):
+        setup_handlers(server_app.web_app)
+    # Reattach to dashboards still running from a previous server session
+    with profiling.timed("restore dashboards"):
+        DashboardManager.instance(parent=server_app).restore()
+    server_app.log.info("Registered {name} server extension".format(**_labextension_data()))
+    if profiling.enabled():
+        server_app.log.info(profiling.report())
 
 
 # For backward compatibility with notebook server, useful for Binder/JupyterHub
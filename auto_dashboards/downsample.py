@@ -0,0 +1,225 @@
+#
+# Copyright 2025 Orange Bricks
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Runtime helpers used by generated dashboards to keep chart payloads small.
+
+Series longer than ``max_points`` are reduced before they are handed to
+plotly or streamlit, either with Largest-Triangle-Three-Buckets (LTTB) or
+with min/max decimation. Passing the visible ``x_range`` restricts the
+reduction to the zoom window, so zooming in reveals more detail while the
+number of points sent to the browser stays bounded.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_MAX_POINTS = 5000
+
+
+def _as_numeric(values: np.ndarray) -> np.ndarray:
+    """
+    Return values as float64, mapping datetimes to their integer ticks
+    """
+    if np.issubdtype(values.dtype, np.datetime64) or np.issubdtype(values.dtype, np.timedelta64):
+        return values.astype("int64").astype("float64")
+    return values.astype("float64", copy=False)
+
+
+def _endpoints(n: int, n_out: int) -> np.ndarray:
+    """
+    Return the first and last indices of n points, capped at n_out of them
+    """
+    return np.unique([0, n - 1])[:max(n_out, 0)]
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select n_out indices with the Largest-Triangle-Three-Buckets algorithm
+    :param x: sorted x values
+    :param y: y values
+    :param n_out: number of points to keep, only the end points below 3
+    """
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return _endpoints(n, n_out)
+
+    x = _as_numeric(np.asarray(x))
+    y = _as_numeric(np.asarray(y))
+
+    # First and last points are always kept, the rest is split in buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Averages of every bucket, computed at once with cumulative sums
+    x_cum = np.concatenate(([0.0], np.cumsum(x)))
+    y_cum = np.concatenate(([0.0], np.nancumsum(y)))
+    counts = ends - starts
+    x_avg = (x_cum[ends] - x_cum[starts]) / counts
+    y_avg = (y_cum[ends] - y_cum[starts]) / counts
+    # The bucket after the last one is the last point itself
+    x_next = np.append(x_avg[1:], x[-1])
+    y_next = np.append(y_avg[1:], y[-1])
+
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = starts[i], ends[i]
+        # Twice the triangle area between the previous selected point,
+        # each candidate in this bucket and the next bucket's average
+        areas = np.abs(
+            (x[prev] - x_next[i]) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (y_next[i] - y[prev])
+        )
+        prev = start + int(np.argmax(np.nan_to_num(areas, nan=-1.0)))
+        indices[i + 1] = prev
+    return indices
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select the minimum and maximum of each bucket, plus both end points
+    :param y: y values
+    :param n_out: maximum number of points to keep, only the end points below 4
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 4:
+        return _endpoints(n, n_out)
+
+    y = _as_numeric(np.asarray(y))
+    n_buckets = (n_out - 2) // 2
+    bucket_size = -(-n // n_buckets)
+    n_buckets = -(-n // bucket_size)
+
+    # Pad the last bucket with NaN so all buckets reshape to the same size
+    padded = np.full(n_buckets * bucket_size, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, bucket_size)
+    valid = ~np.isnan(buckets).all(axis=1)
+    filled_min = np.where(np.isnan(buckets), np.inf, buckets)
+    filled_max = np.where(np.isnan(buckets), -np.inf, buckets)
+
+    offsets = np.arange(n_buckets) * bucket_size
+    mins = offsets + filled_min.argmin(axis=1)
+    maxs = offsets + filled_max.argmax(axis=1)
+    # Buckets made only of NaN keep their first point to preserve the gap
+    mins[~valid] = offsets[~valid]
+    maxs[~valid] = offsets[~valid]
+
+    indices = np.unique(np.concatenate((mins, maxs, [0, n - 1])))
+    return indices[indices < n]
+
+
+def downsample_indices(x: Sequence, y: Sequence, max_points: int = DEFAULT_MAX_POINTS,
+                       x_range: Optional[Tuple] = None, method: str = "lttb") -> np.ndarray:
+    """
+    Return the indices of the points to plot, at most max_points of them
+    :param x: x values, sorted in ascending order. Values that are not
+        numbers or datetimes are replaced by their positions, and x_range
+        is then ignored.
+    :param y: y values
+    :param max_points: upper bound on the number of selected points
+    :param x_range: optional (min, max) of the visible zoom window
+    :param method: "lttb" or "minmax"
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    window = np.arange(len(x))
+    try:
+        x_numeric = _as_numeric(x)
+    except (TypeError, ValueError):
+        # Strings, categories or timezone-aware datetimes as objects
+        x_numeric = None
+
+    if x_numeric is None:
+        x_numeric = window.astype("float64")
+    elif x_range is not None and x_range[0] is not None and x_range[1] is not None:
+        if np.issubdtype(x.dtype, np.datetime64):
+            low, high = np.asarray(x_range, dtype=x.dtype)
+        else:
+            low, high = x_range
+        # Keep one point on each side so lines reach the edges of the view
+        start = max(int(np.searchsorted(x, low, side="left")) - 1, 0)
+        end = min(int(np.searchsorted(x, high, side="right")) + 1, len(x))
+        window = window[start:end]
+
+    if method == "lttb":
+        selected = lttb_indices(x_numeric[window], y[window], max_points)
+    elif method == "minmax":
+        selected = minmax_indices(y[window], max_points)
+    else:
+        raise ValueError(f"Invalid downsampling method: {method}")
+    return window[selected]
+
+
+def downsample(x: Sequence, y: Sequence, max_points: int = DEFAULT_MAX_POINTS,
+               x_range: Optional[Tuple] = None, method: str = "lttb") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a series to at most max_points before plotting it
+    :param x: x values, sorted in ascending order
+    :param y: y values
+    :param max_points: upper bound on the number of returned points
+    :param x_range: optional (min, max) of the visible zoom window
+    :param method: "lttb" or "minmax"
+    :return: the downsampled x and y arrays
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    indices = downsample_indices(x, y, max_points=max_points, x_range=x_range, method=method)
+    return x[indices], y[indices]
+
+
+def downsample_frame(df, x: Optional[str], y: str, max_points: int = DEFAULT_MAX_POINTS,
+                     x_range: Optional[Tuple] = None, method: str = "lttb"):
+    """
+    Reduce the rows of a DataFrame before passing it to a chart call
+    :param df: a pandas DataFrame sorted by the x column
+    :param x: the x column, or None to use the index
+    :param y: the y column driving the point selection
+    :param max_points: upper bound on the number of returned rows
+    :param x_range: optional (min, max) of the visible zoom window
+    :param method: "lttb" or "minmax"
+    :return: the selected rows of df
+    """
+    x_values = df.index.to_numpy() if x is None else df[x].to_numpy()
+    indices = downsample_indices(
+        x_values, df[y].to_numpy(), max_points=max_points, x_range=x_range, method=method
+    )
+    return df.iloc[indices]
+
+
+def relayout_range(relayout_data: Optional[dict]) -> Optional[Tuple]:
+    """
+    Extract the visible x range from a plotly relayoutData event, as
+    received by Dash callbacks on a dcc.Graph
+    :param relayout_data: the relayoutData property of the graph
+    :return: (min, max), or None when the view is not zoomed
+    """
+    if not relayout_data or relayout_data.get("xaxis.autorange"):
+        return None
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        return relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]
+    if "xaxis.range" in relayout_data:
+        low, high = relayout_data["xaxis.range"]
+        return low, high
+    return None
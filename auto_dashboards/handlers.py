@@ -19,12 +19,12 @@ import json
 import os
 from pathlib import Path
 
-from auto_dashboards.prompts import streamlit_prompt, solara_prompt, dash_prompt
-import nbformat
+from auto_dashboards.prompts import streamlit_prompt, solara_prompt, dash_prompt, wire_downsampling
 from jupyter_server.base.handlers import APIHandler
 from jupyter_server.utils import url_path_join
-from openai import OpenAI
 from auto_dashboards.process_manager import DashboardManager
+from auto_dashboards.profiling import import_module, pending_report
+from auto_dashboards import tracing
 import tornado
 
 
@@ -105,23 +105,59 @@ class ModelInfoHandler(APIHandler):
             self.finish(json.dumps({"error": f"Error getting model info: {e}"}))
 
 
+class TraceSummaryHandler(APIHandler):
+    @tornado.web.authenticated
+    def get(self):
+        """Get duration percentiles of the last traced operations"""
+        try:
+            last = self.get_query_argument("last", None)
+            last = int(last) if last is not None else None
+        except ValueError as e:
+            self.set_status(400)
+            self.finish(json.dumps({"error": f"Invalid value for last: {e}"}))
+            return
+        self.finish(json.dumps(tracing.summary(last)))
+
+
 class TranslateHandler(APIHandler):
     @tornado.web.authenticated
     def post(self):
+        with tracing.span("translate") as attributes:
+            self._translate(attributes)
+            attributes["http.status_code"] = self.get_status()
+
+    def _translate(self, attributes):
         # Get notebook path from request body
         try:
             json_payload = self.get_json_body()
             notebook_path = json_payload['file']
             dashboard_type = json_payload['type']
+            attributes["dashboard.type"] = dashboard_type
         except Exception as e:
             self.log.error(f"Error getting JSON payload: {e}")
             self.set_status(500)
             self.finish(json.dumps({"error": f"Error getting JSON payload: {e}"}))
             return
 
+        # openai (with httpx and pydantic) is slow to import, so load it and
+        # nbformat on first translation rather than at server startup
+        try:
+            nbformat = import_module("nbformat")
+            OpenAI = import_module("openai").OpenAI
+        except ImportError as e:
+            self.log.error(f"Error importing translation dependencies: {e}")
+            self.set_status(500)
+            self.finish(json.dumps({"error": f"Error importing translation dependencies: {e}"}))
+            return
+        # Log the profiling report once, after the first lazy imports
+        report = pending_report()
+        if report:
+            self.log.info(report)
+
         # Read notebook content
         try:
-            nb = nbformat.read(notebook_path, as_version=4)
+            with tracing.span("nbformat.read"):
+                nb = nbformat.read(notebook_path, as_version=4)
             self.log.debug(f"Successfully read notebook: {notebook_path}")
         except Exception as e:
             self.set_status(500)
@@ -129,19 +165,21 @@ class TranslateHandler(APIHandler):
             return
 
         # Construct prompt for LLM
-        code = ""
-        for cell in nb.cells:
-            if cell.source.strip():
-                if cell.cell_type == 'code':
-                    code += cell.source + "\n\n"
-                elif cell.cell_type == 'markdown':
-                    code += '# ' + cell.source.replace('\n', '\n# ') + "\n\n"
-        if dashboard_type == "streamlit":
-            prompt = streamlit_prompt(code)
-        elif dashboard_type == "solara":
-            prompt = solara_prompt(code)
-        elif dashboard_type == "dash":
-            prompt = dash_prompt(code)
+        with tracing.span("prompt.build") as prompt_attributes:
+            code = ""
+            for cell in nb.cells:
+                if cell.source.strip():
+                    if cell.cell_type == 'code':
+                        code += cell.source + "\n\n"
+                    elif cell.cell_type == 'markdown':
+                        code += '# ' + cell.source.replace('\n', '\n# ') + "\n\n"
+            if dashboard_type == "streamlit":
+                prompt = streamlit_prompt(code)
+            elif dashboard_type == "solara":
+                prompt = solara_prompt(code)
+            elif dashboard_type == "dash":
+                prompt = dash_prompt(code)
+            prompt_attributes["prompt.chars"] = len(prompt)
         self.log.info(f"Prompt {prompt}")
 
         # Call LLM API
@@ -161,15 +199,17 @@ class TranslateHandler(APIHandler):
                 base_url=api_url if api_url else None
             )
 
-            chat_completion = client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt,
-                    }
-                ],
-                model=model_name,
-            )
+            attributes["llm.model"] = model_name
+            with tracing.span("llm.call", model=model_name):
+                chat_completion = client.chat.completions.create(
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": prompt,
+                        }
+                    ],
+                    model=model_name,
+                )
             generated_code = chat_completion.choices[0].message.content.strip()
 
             # Remove markdown code block backticks with optional language identifiers
@@ -180,6 +220,9 @@ class TranslateHandler(APIHandler):
                 if len(lines) > 1:
                     generated_code = "\n".join(lines[1:-1]).strip()
 
+            # Import the downsampling helpers if the generated code uses them
+            generated_code = wire_downsampling(generated_code)
+
             self.log.debug("Successfully called LLM API")
         except Exception as e:
             self.log.error(f"Error calling LLM API: {e}")
@@ -192,8 +235,9 @@ class TranslateHandler(APIHandler):
 
         # Write generated code to file
         try:
-            with open(output_path, 'w') as f:
-                f.write(generated_code)
+            with tracing.span("file.write"):
+                with open(output_path, 'w') as f:
+                    f.write(generated_code)
             self.log.debug(f"Successfully wrote Streamlit code to: {output_path}")
 
         except Exception as e:
@@ -247,9 +291,11 @@ def setup_handlers(web_app):
     route_pattern = url_path_join(base_url, "streamlit", "app")
     translate_route_pattern = url_path_join(base_url, "streamlit", "translate")
     model_info_route_pattern = url_path_join(base_url, "streamlit", "model-info")
+    trace_summary_route_pattern = url_path_join(base_url, "streamlit", "trace-summary")
     handlers = [
         (route_pattern, RouteHandler), 
         (translate_route_pattern, TranslateHandler),
-        (model_info_route_pattern, ModelInfoHandler)
+        (model_info_route_pattern, ModelInfoHandler),
+        (trace_summary_route_pattern, TraceSummaryHandler)
     ]
     web_app.add_handlers(host_pattern, handlers)
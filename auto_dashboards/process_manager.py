@@ -16,13 +16,20 @@
 #
 
 from abc import ABC, ABCMeta, abstractmethod
+import glob
+import hashlib
+import json
 import os
 import re
+import signal
 import sys
 import socket
-from subprocess import Popen, CalledProcessError, PIPE
-from time import sleep
-from typing import Dict
+from subprocess import Popen, CalledProcessError, STDOUT
+from time import sleep, time
+from typing import Dict, Optional
+from jupyter_core.paths import jupyter_runtime_dir
+from traitlets import Unicode, default
+from auto_dashboards import tracing
 from traitlets.config import SingletonConfigurable, LoggingConfigurable
 from urllib.parse import urlparse
 
@@ -39,18 +46,220 @@ def extract_url(text: str):
         return match.group(1)
     return None
 
+# Largest difference in seconds accepted between the recorded and the
+# actual start time of a process for it to count as the same process
+START_TIME_TOLERANCE = 2.0
+
+def process_start_time(pid: int) -> Optional[float]:
+    """
+    Return the start time of a process as a Unix timestamp, or None when
+    the process does not exist or its start time cannot be determined
+    :param pid: the process id
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).create_time()
+        except psutil.Error:
+            return None
+
+    # Without psutil, only Linux exposes the start time through /proc
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+        with open("/proc/stat") as f:
+            boot_time = next(
+                int(line.split()[1]) for line in f if line.startswith("btime ")
+            )
+    except (OSError, StopIteration, ValueError):
+        return None
+    # The command name may contain spaces, so split after its closing paren
+    fields = stat[stat.rindex(")") + 2:].split()
+    # starttime is field 22 of the stat line, i.e. index 19 after the name
+    return boot_time + int(fields[19]) / os.sysconf("SC_CLK_TCK")
+
+def pid_alive(pid: int, start_time: Optional[float]) -> bool:
+    """
+    Check whether the process launched with the given PID and start time
+    is still running. A PID whose start time cannot be confirmed is never
+    considered alive, so that a reused PID is not mistaken for a dashboard.
+    :param pid: the process id recorded when the dashboard was launched
+    :param start_time: the time recorded when the dashboard was launched
+    """
+    if not pid or not start_time:
+        return False
+    actual_start_time = process_start_time(pid)
+    if actual_start_time is None:
+        return False
+    return abs(actual_start_time - start_time) <= START_TIME_TOLERANCE
+
 class DashboardManager(SingletonConfigurable):
     """Singleton class to keep track of dashboard instances and manage
     their lifecycles
     """
 
+    state_dir = Unicode(
+        config=True,
+        help="Directory of the files recording running dashboards, used to "
+             "reattach to them after a Jupyter server restart"
+    )
+
+    @default("state_dir")
+    def _state_dir_default(self):
+        return jupyter_runtime_dir()
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.dashboard_instances = {}
+        # Identifies this server in its state file, so that other servers
+        # only adopt its dashboards once it is gone
+        self.owner = {
+            "pid": os.getpid(),
+            "start_time": process_start_time(os.getpid())
+        }
+
+    @property
+    def state_prefix(self) -> str:
+        """
+        Prefix of the state files of all servers sharing this root dir.
+        The server port is not used, as it may still change while
+        extensions load.
+        """
+        root_dir = getattr(self.parent, "root_dir", None) or os.getcwd()
+        root_id = hashlib.sha1(os.path.abspath(root_dir).encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.state_dir, f"auto_dashboards_state-{root_id}")
+
+    @property
+    def state_file(self) -> str:
+        """
+        State file written by this server
+        """
+        return f"{self.state_prefix}-{self.owner['pid']}.json"
 
     def list(self) -> Dict:
         return self.dashboard_instances
 
+    def restore(self) -> None:
+        """
+        Reattach to dashboards recorded by previous servers with the same
+        root dir. Files of servers that are still running are left alone;
+        the others are claimed, their live dashboards adopted and their
+        stale entries dropped.
+        """
+        for state_file in sorted(glob.glob(f"{glob.escape(self.state_prefix)}-*.json")):
+            state = self._read_state(state_file)
+            if state is None or self._is_owner_alive(state.get("owner")):
+                continue
+
+            # Rename the file first, so that a concurrently starting server
+            # cannot adopt the same dashboards
+            claimed_file = f"{state_file}.claimed-{os.getpid()}"
+            try:
+                os.replace(state_file, claimed_file)
+            except OSError:
+                continue
+            for path, entry in state["dashboards"].items():
+                self._adopt(path, entry)
+            try:
+                os.remove(claimed_file)
+            except OSError:
+                pass
+
+        self.save()
+
+    def _read_state(self, state_file: str) -> Optional[Dict]:
+        """
+        Read a state file, returning None when it is unreadable or invalid
+        """
+        try:
+            with open(state_file) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as error:
+            self.log.warning(f"Unable to read dashboard state file {state_file}: {error}")
+            return None
+        if not isinstance(state, dict) or not isinstance(state.get("dashboards"), dict):
+            self.log.warning(f"Ignoring invalid dashboard state file {state_file}")
+            return None
+        return state
+
+    def _is_owner_alive(self, owner: Optional[Dict]) -> bool:
+        """
+        Check whether the server that wrote a state file is still running.
+        When its start time cannot be read, it is assumed to be running as
+        long as its PID exists, so that its dashboards are never taken over.
+        """
+        if not isinstance(owner, dict) or not owner.get("pid"):
+            return False
+        if owner == self.owner:
+            return True
+        if process_start_time(owner["pid"]) is not None:
+            return pid_alive(owner["pid"], owner.get("start_time"))
+        if os.name == "nt":
+            return False
+        try:
+            os.kill(owner["pid"], 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True
+        return True
+
+    def _adopt(self, path: str, entry: Dict) -> None:
+        """
+        Reattach to a dashboard recorded by a previous server if it is
+        still running
+        """
+        try:
+            if not pid_alive(entry["pid"], entry.get("start_time")):
+                self.log.info(f"Removing stale dashboard entry for {path}")
+                return
+            dashboard_app = create_dashboard(entry["type"], path=path, port=entry["port"])
+            dashboard_app.reattach(
+                pid=entry["pid"],
+                start_time=entry.get("start_time"),
+                internal_host=entry.get("internal_host", {})
+            )
+        except (KeyError, TypeError, ValueError) as error:
+            self.log.warning(f"Ignoring invalid dashboard entry for {path}: {error}")
+            return
+        if path in self.dashboard_instances:
+            # Another previous server ran the same file, nothing would
+            # reap this copy otherwise
+            dashboard_app.stop()
+            return
+        self.log.info(
+            f"Reattached to dashboard '{dashboard_app.app_basename}' "
+            f"on port {dashboard_app.port} (pid {dashboard_app.pid})"
+        )
+        self.dashboard_instances[path] = dashboard_app
+
+    def save(self) -> None:
+        """
+        Write the running dashboards to the state file of this server.
+        """
+        dashboards = {
+            path: dashboard_app.to_state()
+            for path, dashboard_app in self.dashboard_instances.items()
+            if dashboard_app.is_alive()
+        }
+        try:
+            if not dashboards:
+                if os.path.exists(self.state_file):
+                    os.remove(self.state_file)
+                return
+            tmp_file = f"{self.state_file}.tmp"
+            os.makedirs(self.state_dir, exist_ok=True)
+            with open(tmp_file, "w") as f:
+                json.dump({"owner": self.owner, "dashboards": dashboards}, f, indent=2)
+            os.replace(tmp_file, self.state_file)
+        except OSError as error:
+            self.log.warning(f"Unable to write dashboard state file {self.state_file}: {error}")
+
     def start(self, path: str, app: str = "streamlit") -> 'BaseDashboard':
         """
         Start the dashboard application.
@@ -60,17 +269,10 @@ class DashboardManager(SingletonConfigurable):
         if path in self.dashboard_instances.keys():
             return self.dashboard_instances[path]
         
-        if app == "solara":
-            dashboard_app = SolaraApplication(path=path)
-        elif app == "streamlit":
-            dashboard_app = StreamlitApplication(path=path)
-        elif app == "dash":
-            dashboard_app = DashApplication(path=path)
-        else:
-            raise ValueError(f"Invalid dashboard application type: {app}")
-        
+        dashboard_app = create_dashboard(app, path=path)
         dashboard_app.start()
         self.dashboard_instances[path] = dashboard_app
+        self.save()
         return dashboard_app
 
     def stop(self, path: str) -> None:
@@ -78,6 +280,7 @@ class DashboardManager(SingletonConfigurable):
         if dashboard_app:
             dashboard_app.stop()
             del self.dashboard_instances[path]
+            self.save()
         else:
             self.log.info(
                 "Unable to find running instance of ",
@@ -95,6 +298,7 @@ class DashboardManager(SingletonConfigurable):
         if dashboard_app:
             dashboard_app.stop()
             dashboard_app.start()
+            self.save()
         else:
             self.log.info(
                 "Unable to find running instance of ",
@@ -105,16 +309,22 @@ class BaseDashboard(LoggingConfigurable, metaclass=DashboardMeta):
     """
     Abstract base class for all dashboards
     """
-    def __init__(self, path: str, **kwargs):
+    app_type = None
+
+    def __init__(self, path: str, port: Optional[str] = None, **kwargs):
         """
         :param path: the path to the dashboard application
+        :param port: the port of an already running application
         """
         super().__init__(**kwargs)
         self.path = path
         self.app_start_dir = os.path.dirname(path)
         self.app_basename = os.path.basename(path)
-        self.port = get_open_port()
+        self.port = str(port) if port else get_open_port()
         self.process = None
+        self.pid = None
+        self.start_time = None
+        self.output = None
         self.internal_host = {}
 
     @abstractmethod
@@ -128,47 +338,157 @@ class BaseDashboard(LoggingConfigurable, metaclass=DashboardMeta):
         """
         Start the dashboard application
         """
-        if not self.process or not self.is_alive():
+        if not self.is_alive():
+            with tracing.span("dashboard.start", **{"dashboard.type": self.app_type}):
+                self._start()
+
+    def _start(self) -> None:
+        """
+        Launch the dashboard process and wait for it to report its URL
+        """
+        self.log.info(
+            f"Starting dashboard '{self.app_basename}' ",
+            f"on port {self.port}"
+        )
+        cmd = self.get_run_command()
+        # Write the process output to a log file rather than a pipe, so
+        # the dashboard keeps running when the Jupyter server goes away
+        log_path = self.get_log_path()
+        os.makedirs(os.path.dirname(log_path), exist_ok=True)
+        try:
+            with tracing.span("dashboard.spawn"), open(log_path, "wb") as log_file:
+                self.process = Popen(
+                    cmd,
+                    cwd=self.app_start_dir or None,
+                    stdout=log_file,
+                    stderr=STDOUT,
+                    start_new_session=True
+                )
+        except CalledProcessError as error:
             self.log.info(
-                f"Starting dashboard '{self.app_basename}' ",
-                f"on port {self.port}"
+                "Failed to start dashboard ",
+                f"on port {self.port} due to {error}"
             )
-            cmd = self.get_run_command()
-            try:
-                if self.app_start_dir:
-                    self.process = Popen(cmd, cwd=self.app_start_dir, stdout=PIPE)
-                else:
-                    self.process = Popen(cmd, stdout=PIPE)
-            except CalledProcessError as error:
-                self.log.info(
-                    "Failed to start dashboard ",
-                    f"on port {self.port} due to {error}"
-                )
+            return
+        self.pid = self.process.pid
+        self.start_time = process_start_time(self.pid) or time()
+
+        self.output = open(log_path, "r", encoding="utf-8", errors="replace")
+        try:
+            with tracing.span("dashboard.ready"):
+                self.internal_host = self.parse_hostname()
+        finally:
+            self.output.close()
+            self.output = None
+
+    def reattach(self, pid: int, start_time: Optional[float], internal_host: Dict) -> None:
+        """
+        Adopt a dashboard process launched by a previous Jupyter server
+        :param pid: the process id of the running dashboard
+        :param start_time: the time the process was launched
+        :param internal_host: the hostname and scheme parsed at launch
+        """
+        self.process = None
+        self.pid = pid
+        self.start_time = start_time
+        self.internal_host = internal_host
+
+    def to_state(self) -> Dict:
+        """
+        Return the record of this dashboard saved in the state file
+        """
+        return {
+            "type": self.app_type,
+            "port": self.port,
+            "pid": self.pid,
+            "start_time": self.start_time,
+            "internal_host": self.internal_host
+        }
+
+    def get_log_path(self) -> str:
+        """
+        Return the path of the file receiving the dashboard process output
+        """
+        return os.path.join(jupyter_runtime_dir(), f"auto_dashboards-{self.port}.log")
+
+    def read_output_line(self, timeout: float = 30) -> str:
+        """
+        Read the next line of the dashboard process output, waiting for
+        the process to write it
+        :param timeout: maximum number of seconds to wait
+        """
+        line = ""
+        deadline = time() + timeout
+        while time() < deadline:
+            line += self.output.readline()
+            if line.endswith("\n"):
+                break
+            if self.process.poll() is not None:
+                line += self.output.read()
+                break
+            sleep(0.05)
+        return line
+
+    def read_output_url(self, max_lines: int = 50) -> Optional[str]:
+        """
+        Return the first URL printed by the dashboard process. Warnings
+        written to stderr share the log, so skip lines until one matches.
+        :param max_lines: maximum number of lines to read
+        """
+        for i in range(max_lines):
+            line = self.read_output_line()
+            url = extract_url(line)
+            if url:
+                return url
+            if not line:
+                break
+        return None
 
-            self.internal_host = self.parse_hostname()
-    
     def stop(self) -> None:
         """
         Stop the dashboard application
         """
-        if self.process:
+        if self.process or self.pid:
             self.log.info(
                 f"Stopping dashboard '{self.app_basename}' ",
                 f"on port {self.port}"
             )
-            self.process.terminate()
+            if self.process:
+                self.terminate_group(self.process.pid)
+            elif pid_alive(self.pid, self.start_time):
+                # Process adopted from a previous Jupyter server
+                self.terminate_group(self.pid)
             self.process = None
+            self.pid = None
         else:
             self.log.info(
                 f"Dashboard '{self.app_basename}' is not running"
             )
 
+    def terminate_group(self, pid: int) -> None:
+        """
+        Terminate a dashboard process together with the workers it spawned.
+        Dashboards run in their own session, so their process group only
+        holds the dashboard processes.
+        :param pid: the process id of the dashboard, which leads its group
+        """
+        try:
+            if os.name == "nt":
+                os.kill(pid, signal.SIGTERM)
+            else:
+                os.killpg(os.getpgid(pid), signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
     def is_alive(self) -> bool:
         """
         Check if child process has terminated.
         """
         if self.process:
             return False if self.process.poll() else True
+        elif self.pid:
+            # Process adopted from a previous Jupyter server
+            return pid_alive(self.pid, self.start_time)
         else:
             return False
     
@@ -185,6 +505,8 @@ class BaseDashboard(LoggingConfigurable, metaclass=DashboardMeta):
 
 
 class StreamlitApplication(BaseDashboard):
+    app_type = "streamlit"
+
     def __init__(self, path: str, **kwargs):
         super().__init__(path, **kwargs)
 
@@ -204,13 +526,8 @@ class StreamlitApplication(BaseDashboard):
         #
         #   Local URL: http://localhost:12345
 
-        # Skip 3 lines withouth useful information
-        for i in range(3):
-            self.process.stdout.readline()
-        internal_url_line = self.process.stdout.readline().decode('utf-8')
-
-        # Extract URL from output line
-        url = extract_url(internal_url_line)
+        # Extract the first URL, skipping lines without useful information
+        url = self.read_output_url()
         url_obj = urlparse(url)
 
         return {
@@ -220,6 +537,8 @@ class StreamlitApplication(BaseDashboard):
 
 
 class SolaraApplication(BaseDashboard):
+    app_type = "solara"
+
     def __init__(self, path: str, **kwargs):
         super().__init__(path, **kwargs)
 
@@ -238,14 +557,12 @@ class SolaraApplication(BaseDashboard):
         # Solara process output looks like:
         #   Solara server is starting at http://localhost:12345
 
-        # Parse output line ("Solara server is starting at http://localhost:12345")
-        output_line = self.process.stdout.readline().decode('utf-8')
+        # Parse URL from output line ("Solara server is starting at http://localhost:12345")
+        url = self.read_output_url()
 
         # Wait for the server to get ready to accept connections
         sleep(1)
 
-        # Extract URL from output line
-        url = extract_url(output_line)
         url_obj = urlparse(url)
         
         return {
@@ -255,6 +572,8 @@ class SolaraApplication(BaseDashboard):
 
 
 class DashApplication(BaseDashboard):
+    app_type = "dash"
+
     def __init__(self, path: str, **kwargs):
         super().__init__(path, **kwargs)
 
@@ -273,14 +592,12 @@ class DashApplication(BaseDashboard):
         #   * Serving Flask app 'app'
         #   * Debug mode: off
 
-        # Parse output line with URL
-        output_line = self.process.stdout.readline().decode('utf-8')
+        # Parse URL from output line
+        url = self.read_output_url()
 
         # Wait for the server to get ready to accept connections
         sleep(1)
 
-        # Extract URL from output line
-        url = extract_url(output_line)
         url_obj = urlparse(url)
         
         return {
@@ -288,6 +605,21 @@ class DashApplication(BaseDashboard):
             "scheme": url_obj.scheme
         }
 
+def create_dashboard(app: str, path: str, **kwargs) -> BaseDashboard:
+    """
+    Create a dashboard instance of the given application type
+    :param app: the type of dashboard application ("streamlit", "solara" or "dash")
+    :param path: the path to the dashboard file
+    """
+    if app == "solara":
+        return SolaraApplication(path=path, **kwargs)
+    elif app == "streamlit":
+        return StreamlitApplication(path=path, **kwargs)
+    elif app == "dash":
+        return DashApplication(path=path, **kwargs)
+    else:
+        raise ValueError(f"Invalid dashboard application type: {app}")
+
 def get_open_port() -> str:
     """
     Returns an open port on the application host
@@ -0,0 +1,99 @@
+#
+# Copyright 2025 Orange Bricks
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import importlib
+import os
+import sys
+from contextlib import contextmanager
+from time import perf_counter
+from types import ModuleType
+from typing import Dict, Optional
+
+# Set to a non-empty value other than "0" to log the startup profiling report
+PROFILE_ENV = "AUTO_DASHBOARDS_PROFILE"
+
+# Durations in seconds of the profiled startup stages and lazy imports
+timings: Dict[str, float] = {}
+
+# Start of the package import, as this module is the first one it loads
+_import_start = perf_counter()
+
+# Whether a lazy import was recorded since the report was last taken
+_pending = False
+
+
+def enabled() -> bool:
+    """
+    Check whether the startup profiling report was requested
+    """
+    return os.environ.get(PROFILE_ENV, "") not in ("", "0")
+
+
+def record_import(name: str) -> None:
+    """
+    Record the time elapsed since the package started importing
+    :param name: the stage name shown in the report
+    """
+    timings[name] = perf_counter() - _import_start
+
+
+@contextmanager
+def timed(name: str):
+    """
+    Record the duration of the enclosed block under the given name
+    :param name: the stage name shown in the report
+    """
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = perf_counter() - start
+
+
+def import_module(name: str) -> ModuleType:
+    """
+    Import a heavy dependency on first use, recording how long it took
+    :param name: the module name
+    """
+    global _pending
+    module = sys.modules.get(name)
+    if module is None:
+        with timed(f"import {name}"):
+            module = importlib.import_module(name)
+        _pending = True
+    return module
+
+
+def pending_report() -> Optional[str]:
+    """
+    Return the report once after lazy imports actually ran, or None when
+    profiling is disabled or nothing was imported since the last report
+    """
+    global _pending
+    if not enabled() or not _pending:
+        return None
+    _pending = False
+    return report()
+
+
+def report() -> str:
+    """
+    Return the recorded timings formatted one stage per line
+    """
+    lines = ["auto_dashboards startup profile:"]
+    for name, duration in timings.items():
+        lines.append(f"  {name}: {duration * 1000:.1f} ms")
+    return "\n".join(lines)
@@ -1,8 +1,48 @@
+import re
+
+DOWNSAMPLE_INSTRUCTIONS = """
+When a chart plots a series that can have more than a few thousand points, reduce it before passing it to plotly or streamlit chart calls with the helpers from `auto_dashboards.downsample`:
+```python
+from auto_dashboards.downsample import downsample, downsample_frame
+
+x, y = downsample(x, y, max_points=5000)
+df = downsample_frame(df, x="time", y="value", max_points=5000)  # x=None uses the index
+```
+The data must be sorted by x. Do not downsample data used for tables or aggregations.
+"""
+
+DASH_DOWNSAMPLE_INSTRUCTIONS = """For zoomable Dash graphs, pass the visible window so zooming in shows more detail: add `Input('graph', 'relayoutData')` to the callback and call `downsample(x, y, x_range=relayout_range(relayout_data))`, importing `relayout_range` from `auto_dashboards.downsample`.
+"""
+
+_DOWNSAMPLE_CALL = re.compile(r"(?<![\w.])(downsample|downsample_frame|relayout_range)\(")
+_DOWNSAMPLE_IMPORT = re.compile(r"^\s*from auto_dashboards\.downsample import\s+(\([^)]*\)|[^\n]*)", re.MULTILINE)
+_FUTURE_IMPORT = re.compile(r"^from __future__ import .*\n", re.MULTILINE)
+
+
+def wire_downsampling(code: str):
+    """Add the downsampling helpers the generated code calls without importing them"""
+    imported = set()
+    for names in _DOWNSAMPLE_IMPORT.findall(code):
+        for name in re.sub(r"#[^\n]*", "", names).strip().strip("()").split(","):
+            # "downsample as ds" binds ds, not downsample
+            parts = name.split()
+            if parts:
+                imported.add(parts[-1])
+    names = sorted(set(_DOWNSAMPLE_CALL.findall(code)) - imported)
+    if not names:
+        return code
+    import_line = f"from auto_dashboards.downsample import {', '.join(names)}\n"
+    # __future__ imports must stay at the top of the module
+    future_imports = list(_FUTURE_IMPORT.finditer(code))
+    position = future_imports[-1].end() if future_imports else 0
+    return code[:position] + import_line + code[position:]
+
 def streamlit_prompt(code: str):
     prompt = "Translate the following Python code to Streamlit dashboard:\n\n"
     prompt += "```python\n"
     prompt += code
     prompt += "```\n"
+    prompt += DOWNSAMPLE_INSTRUCTIONS
     prompt += "Only output the Streamlit code and no comments or explanations."
 
     return prompt
@@ -27,6 +67,7 @@ def Page():
     prompt += "```python\n"
     prompt += code
     prompt += "```\n"
+    prompt += DOWNSAMPLE_INSTRUCTIONS
     prompt += "Only output the Solara code and no comments or explanations."
 
     return prompt
@@ -62,6 +103,8 @@ if __name__ == '__main__':
     prompt += "```python\n"
     prompt += code
     prompt += "```\n"
+    prompt += DOWNSAMPLE_INSTRUCTIONS
+    prompt += DASH_DOWNSAMPLE_INSTRUCTIONS
     prompt += "Only output the Plotly Dash code and no comments or explanations. Make sure to include code that allows the app to be run with the command-line arguments: app.run_server(host='0.0.0.0', port=int(port), debug=False) if port is passed as a command-line argument."
 
     return prompt
\ No newline at end of file
@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from auto_dashboards.downsample import downsample, downsample_indices, lttb_indices, minmax_indices
+from auto_dashboards.prompts import wire_downsampling
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    x = np.arange(10_001)
+    y = np.sin(x / 100) + rng.normal(scale=0.1, size=len(x))
+    return x, y
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+@pytest.mark.parametrize("max_points", [0, 1, 2, 3, 4, 5, 7, 100, 999])
+def test_output_is_bounded(series, method, max_points):
+    x, y = series
+    indices = downsample_indices(x, y, max_points=max_points, method=method)
+    assert len(indices) <= max_points
+    assert np.all(np.diff(indices) > 0)
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_endpoints_are_kept(series, method):
+    x, y = series
+    indices = downsample_indices(x, y, max_points=50, method=method)
+    assert indices[0] == 0
+    assert indices[-1] == len(x) - 1
+
+
+def test_short_series_is_unchanged():
+    assert list(lttb_indices(np.arange(5), np.arange(5), 10)) == [0, 1, 2, 3, 4]
+    assert list(minmax_indices(np.arange(5), 10)) == [0, 1, 2, 3, 4]
+
+
+def test_lttb_buckets_pick_one_point_each(series):
+    x, y = series
+    indices = lttb_indices(x, y, 100)
+    assert len(indices) == 100
+    assert len(np.unique(indices)) == 100
+
+
+def test_minmax_keeps_extremes():
+    y = np.zeros(1_000)
+    y[123] = 5
+    y[877] = -5
+    indices = minmax_indices(y, 10)
+    assert 123 in indices
+    assert 877 in indices
+
+
+def test_zoom_window(series):
+    x, y = series
+    zoomed_x, _ = downsample(x, y, max_points=100, x_range=(2_000, 3_000))
+    assert len(zoomed_x) == 100
+    # One point on each side of the window keeps lines reaching the edges
+    assert zoomed_x[0] == 1_999
+    assert zoomed_x[-1] == 3_001
+
+
+def test_zoom_window_with_datetimes(series):
+    _, y = series
+    x = np.datetime64("2024-01-01T00:00:00") + np.arange(len(y)).astype("timedelta64[m]")
+    zoomed_x, _ = downsample(x, y, max_points=50, x_range=("2024-01-02 00:00:00", "2024-01-03 00:00:00"))
+    assert len(zoomed_x) == 50
+    assert zoomed_x[0] == np.datetime64("2024-01-01T23:59")
+    assert zoomed_x[-1] == np.datetime64("2024-01-03T00:01")
+
+
+def test_non_numeric_x_uses_positions(series):
+    _, y = series
+    x = np.array([f"label {i}" for i in range(len(y))])
+    zoomed_x, _ = downsample(x, y, max_points=100, x_range=("label 1", "label 2"))
+    assert len(zoomed_x) == 100
+    assert zoomed_x[0] == "label 0"
+    assert zoomed_x[-1] == x[-1]
+
+
+def test_wire_downsampling_adds_missing_import():
+    code = "import plotly.express as px\nx, y = downsample(x, y)\n"
+    assert wire_downsampling(code).startswith("from auto_dashboards.downsample import downsample\n")
+
+
+def test_wire_downsampling_adds_only_missing_names():
+    code = (
+        "from auto_dashboards.downsample import downsample\n"
+        "x, y = downsample(x, y, x_range=relayout_range(relayout_data))\n"
+    )
+    wired = wire_downsampling(code)
+    assert wired == "from auto_dashboards.downsample import relayout_range\n" + code
+
+
+def test_wire_downsampling_keeps_complete_imports():
+    code = (
+        "from auto_dashboards.downsample import (\n"
+        "    downsample,  # series\n"
+        "    relayout_range,\n"
+        ")\n"
+        "x, y = downsample(x, y, x_range=relayout_range(relayout_data))\n"
+    )
+    assert wire_downsampling(code) == code
+
+
+def test_timezone_aware_objects_use_positions(series):
+    _, y = series
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    x = np.array([start + timedelta(minutes=i) for i in range(len(y))], dtype=object)
+    assert len(downsample(x, y, max_points=100)[0]) == 100
@@ -0,0 +1,153 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from auto_dashboards.process_manager import DashboardManager, pid_alive, process_start_time
+
+pytestmark = pytest.mark.skipif(
+    process_start_time(os.getpid()) is None,
+    reason="process start times are not available on this platform"
+)
+
+# Stands in for a Dash app: prints its URL like Dash does, then keeps running
+APP = """
+import sys, time
+print("Dash is running on http://127.0.0.1:" + sys.argv[sys.argv.index("--port") + 1] + "/", flush=True)
+time.sleep(60)
+"""
+
+
+@pytest.fixture
+def app_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("JUPYTER_RUNTIME_DIR", str(tmp_path / "runtime"))
+    path = tmp_path / "app.py"
+    path.write_text(APP)
+    return str(path)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    managers = []
+
+    def create():
+        managers.append(DashboardManager(state_dir=str(tmp_path / "state")))
+        return managers[-1]
+
+    yield create
+    for dashboard_manager in managers:
+        for path in list(dashboard_manager.list()):
+            dashboard_manager.stop(path)
+
+
+def read_state(dashboard_manager):
+    with open(dashboard_manager.state_file) as f:
+        return json.load(f)
+
+
+def write_state(dashboard_manager, state):
+    with open(dashboard_manager.state_file, "w") as f:
+        json.dump(state, f)
+
+
+def orphan(dashboard_manager, **entry_changes):
+    """Make the state file look like it was left by a server that exited"""
+    state = read_state(dashboard_manager)
+    state["owner"]["start_time"] -= 1000
+    for entry in state["dashboards"].values():
+        entry.update(entry_changes)
+    write_state(dashboard_manager, state)
+    # The dashboards now belong to the previous server only
+    dashboard_manager.dashboard_instances.clear()
+    return state
+
+
+def test_matching_start_time_reattaches(app_path, manager):
+    previous = manager()
+    dashboard_app = previous.start(app_path, app="dash")
+    assert dashboard_app.internal_host == {"host": "127.0.0.1", "scheme": "http"}
+    orphan(previous)
+
+    current = manager()
+    current.restore()
+    adopted = current.list()[app_path]
+    assert adopted.pid == dashboard_app.pid
+    assert adopted.port == dashboard_app.port
+    assert adopted.is_alive()
+    assert list(read_state(current)["dashboards"]) == [app_path]
+
+    current.stop(app_path)
+    dashboard_app.process.wait(timeout=10)
+    assert not pid_alive(dashboard_app.pid, dashboard_app.start_time)
+
+
+def test_mismatched_start_time_is_dropped(app_path, manager):
+    previous = manager()
+    dashboard_app = previous.start(app_path, app="dash")
+    orphan(previous, start_time=dashboard_app.start_time - 1000)
+
+    current = manager()
+    current.restore()
+    assert current.list() == {}
+    assert not os.path.exists(current.state_file)
+    # An unverified PID is never signalled
+    assert dashboard_app.process.poll() is None
+    dashboard_app.stop()
+
+
+def test_dead_pid_is_dropped(app_path, manager):
+    finished = subprocess.Popen([sys.executable, "-c", "pass"])
+    finished.wait()
+    previous = manager()
+    dashboard_app = previous.start(app_path, app="dash")
+    orphan(previous, pid=finished.pid)
+
+    current = manager()
+    current.restore()
+    assert current.list() == {}
+    dashboard_app.stop()
+
+
+def test_running_owner_keeps_its_dashboards(app_path, manager, tmp_path):
+    previous = manager()
+    previous.start(app_path, app="dash")
+    state = read_state(previous)
+    # Same root dir, written by another server that is still running
+    other_file = previous.state_file.replace(f"-{os.getpid()}.json", "-1.json")
+    state["owner"] = {"pid": os.getppid(), "start_time": process_start_time(os.getppid())}
+    with open(other_file, "w") as f:
+        json.dump(state, f)
+    os.remove(previous.state_file)
+
+    current = manager()
+    current.restore()
+    assert current.list() == {}
+    assert os.path.exists(other_file)
+
+
+@pytest.mark.parametrize("content", ["[]", "{", '{"dashboards": []}'])
+def test_invalid_state_file_is_ignored(manager, content):
+    current = manager()
+    os.makedirs(current.state_dir)
+    with open(f"{current.state_prefix}-1.json", "w") as f:
+        f.write(content)
+
+    current.restore()
+    assert current.list() == {}
+
+
+def test_save_leaves_out_dead_instances(app_path, manager, tmp_path):
+    other_path = str(tmp_path / "other.py")
+    with open(other_path, "w") as f:
+        f.write(APP)
+    current = manager()
+    current.start(app_path, app="dash")
+    dead_app = current.start(other_path, app="dash")
+    assert sorted(read_state(current)["dashboards"]) == sorted([app_path, other_path])
+
+    dead_app.process.kill()
+    dead_app.process.wait(timeout=10)
+    current.save()
+    assert list(read_state(current)["dashboards"]) == [app_path]
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from auto_dashboards import tracing
+
+
+@pytest.fixture(autouse=True)
+def trace_log(tmp_path, monkeypatch):
+    path = tmp_path / "trace.jsonl"
+    monkeypatch.setenv(tracing.TRACE_LOG_ENV, str(path))
+    monkeypatch.setattr(tracing, "operations", tracing.deque(maxlen=tracing.MAX_OPERATIONS))
+    return path
+
+
+def test_nested_spans_are_recorded_in_operation(trace_log):
+    with tracing.span("translate", **{"dashboard.type": "dash"}) as attributes:
+        with tracing.span("llm.call", model="gpt"):
+            pass
+        with tracing.span("file.write"):
+            pass
+        attributes["http.status_code"] = 200
+
+    operation, = tracing.operations
+    assert operation["operation"] == "translate"
+    assert operation["status"] == "ok"
+    assert operation["attributes"] == {"dashboard.type": "dash", "http.status_code": 200}
+    assert [stage["name"] for stage in operation["spans"]] == ["llm.call", "file.write"]
+    assert operation["spans"][0]["attributes"] == {"model": "gpt"}
+
+    logged, = [json.loads(line) for line in trace_log.read_text().splitlines()]
+    assert logged["operation"] == "translate"
+    assert len(logged["spans"]) == 2
+
+
+def test_exception_marks_operation_failed():
+    with pytest.raises(RuntimeError):
+        with tracing.span("translate"):
+            with tracing.span("llm.call"):
+                raise RuntimeError("timeout")
+
+    operation, = tracing.operations
+    assert operation["status"] == "error"
+    assert [stage["name"] for stage in operation["spans"]] == ["llm.call"]
+
+
+@pytest.mark.parametrize("status_code, status", [(200, "ok"), (400, "ok"), (500, "error")])
+def test_status_code_marks_operation_failed(status_code, status):
+    with tracing.span("translate") as attributes:
+        attributes["http.status_code"] = status_code
+
+    assert tracing.operations[0]["status"] == status
+
+
+def test_summary_separates_failures_and_keeps_their_stages():
+    tracing.operations.extend([
+        {"operation": "translate", "status": "ok", "duration_ms": 10.0,
+         "spans": [{"name": "llm.call", "duration_ms": 8.0}]},
+        {"operation": "translate", "status": "ok", "duration_ms": 20.0,
+         "spans": [{"name": "llm.call", "duration_ms": 18.0}]},
+        {"operation": "translate", "status": "error", "duration_ms": 60000.0,
+         "spans": [{"name": "llm.call", "duration_ms": 59999.0}]},
+    ])
+
+    result = tracing.summary()
+    assert result["count"] == 3
+    translate = result["operations"]["translate"]
+    assert translate["count"] == 2
+    assert translate["p50_ms"] == 10.0
+    assert translate["max_ms"] == 20.0
+    assert translate["errors"] == {
+        "count": 1, "p50_ms": 60000.0, "p90_ms": 60000.0, "p99_ms": 60000.0, "max_ms": 60000.0
+    }
+    # The slow failed LLM call still shows up in the stage percentiles
+    assert result["stages"]["llm.call"]["count"] == 3
+    assert result["stages"]["llm.call"]["max_ms"] == 59999.0
+
+
+def test_summary_of_last_operations():
+    for duration in [1.0, 2.0, 3.0, 4.0]:
+        tracing.operations.append(
+            {"operation": "translate", "status": "ok", "duration_ms": duration, "spans": []}
+        )
+
+    result = tracing.summary(last=2)
+    assert result["count"] == 2
+    assert result["operations"]["translate"]["count"] == 2
+    assert result["operations"]["translate"]["p50_ms"] == 3.0
+    assert tracing.summary(last=0) == {"count": 0, "operations": {}, "stages": {}}
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert tracing.percentile(values, 50) == 50
+    assert tracing.percentile(values, 99) == 99
+    assert tracing.percentile([5.0], 90) == 5.0
@@ -0,0 +1,192 @@
+#
+# Copyright 2025 Orange Bricks
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import logging
+import math
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import lru_cache
+from time import perf_counter, time
+from typing import Dict, List, Optional
+
+from jupyter_core.paths import jupyter_runtime_dir
+
+# Path of the JSON-lines trace log, set to an empty value to disable it
+TRACE_LOG_ENV = "AUTO_DASHBOARDS_TRACE_LOG"
+
+# Number of operations kept in memory for the summary endpoint
+MAX_OPERATIONS = 1000
+
+# Size after which the trace log is rotated to a single backup file
+MAX_LOG_BYTES = 10 * 1024 * 1024
+
+PERCENTILES = (50, 90, 99)
+
+log = logging.getLogger(__name__)
+
+operations = deque(maxlen=MAX_OPERATIONS)
+_current_operation: ContextVar[Optional[Dict]] = ContextVar("auto_dashboards_operation", default=None)
+_log_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _otel_tracer():
+    """
+    Return an OpenTelemetry tracer if the API is installed, else None.
+    Spans go to whatever exporter the OpenTelemetry SDK is configured with.
+    """
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        return None
+    return trace.get_tracer("auto_dashboards")
+
+
+def get_log_path() -> Optional[str]:
+    """
+    Return the path of the trace log, or None when it is disabled
+    """
+    path = os.environ.get(TRACE_LOG_ENV)
+    if path is None:
+        return os.path.join(jupyter_runtime_dir(), "auto_dashboards_trace.jsonl")
+    return path or None
+
+
+def _write_log(record: Dict) -> None:
+    path = get_log_path()
+    if not path:
+        return
+    line = json.dumps(record, default=str) + "\n"
+    with _log_lock:
+        try:
+            if os.path.exists(path) and os.path.getsize(path) > MAX_LOG_BYTES:
+                os.replace(path, f"{path}.1")
+            with open(path, "a") as f:
+                f.write(line)
+        except OSError as error:
+            log.warning(f"Unable to write trace log {path}: {error}")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a stage of an operation. The outermost span is the operation
+    itself: when it ends, it is written to the trace log together with
+    the nested spans and kept for the percentile summary. An operation
+    fails when it raises or records an "http.status_code" of 500 or more.
+    :param name: the stage name, e.g. "llm.call"
+    :param attributes: extra attributes recorded with the span
+    :return: the attributes dict, which can be updated inside the block
+    """
+    operation = _current_operation.get()
+    is_root = operation is None
+    if is_root:
+        operation = {
+            "operation": name,
+            "start": time(),
+            "status": "ok",
+            "attributes": attributes,
+            "spans": []
+        }
+        token = _current_operation.set(operation)
+
+    tracer = _otel_tracer()
+    otel_span = tracer.start_as_current_span(name) if tracer else nullcontext()
+    start = perf_counter()
+    try:
+        with otel_span as current:
+            try:
+                yield attributes
+            finally:
+                if current is not None:
+                    for key, value in attributes.items():
+                        if value is not None:
+                            current.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+    except BaseException:
+        operation["status"] = "error"
+        raise
+    finally:
+        duration_ms = (perf_counter() - start) * 1000
+        if is_root:
+            _current_operation.reset(token)
+            if attributes.get("http.status_code", 0) >= 500:
+                operation["status"] = "error"
+            operation["duration_ms"] = duration_ms
+            operations.append(operation)
+            _write_log(operation)
+        else:
+            operation["spans"].append({
+                "name": name,
+                "duration_ms": duration_ms,
+                "attributes": attributes
+            })
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile of a non-empty list
+    """
+    ordered = sorted(values)
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def _stats(values: List[float]) -> Dict:
+    stats = {"count": len(values)}
+    if values:
+        for p in PERCENTILES:
+            stats[f"p{p}_ms"] = round(percentile(values, p), 3)
+        stats["max_ms"] = round(max(values), 3)
+    return stats
+
+
+def summary(last: Optional[int] = None) -> Dict:
+    """
+    Summarize the durations of the last operations and of their stages.
+    Successful and failed operations get separate percentiles, so that
+    failures returning early do not hide regressions while slow failures,
+    such as LLM timeouts, stay visible. Stages cover all operations.
+    :param last: number of most recent operations to include, all if None
+    """
+    recent = list(operations)
+    if last is not None:
+        recent = recent[-last:] if last > 0 else []
+
+    ok_durations: Dict[str, List[float]] = {}
+    error_durations: Dict[str, List[float]] = {}
+    stage_durations: Dict[str, List[float]] = {}
+    for operation in recent:
+        name = operation["operation"]
+        ok_durations.setdefault(name, [])
+        error_durations.setdefault(name, [])
+        if operation["status"] == "ok":
+            ok_durations[name].append(operation["duration_ms"])
+        else:
+            error_durations[name].append(operation["duration_ms"])
+        for stage in operation["spans"]:
+            stage_durations.setdefault(stage["name"], []).append(stage["duration_ms"])
+
+    result = {"count": len(recent), "operations": {}, "stages": {}}
+    for name, values in ok_durations.items():
+        result["operations"][name] = _stats(values)
+        result["operations"][name]["errors"] = _stats(error_durations[name])
+    for name, values in stage_durations.items():
+        result["stages"][name] = _stats(values)
+    return result
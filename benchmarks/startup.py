@@ -0,0 +1,111 @@
+#
+# Copyright 2025 Orange Bricks
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Regression benchmark for the startup cost auto_dashboards adds to a
+Jupyter server.
+
+Each run imports the extension in a fresh interpreter where the modules
+the server loads anyway are already imported, then runs its load hook
+against a stub server with an empty dashboard state directory. Only the
+cost of the extension itself is measured. Exits with a non-zero status when
+the median of import plus registration exceeds the budget, or when a
+lazily loaded dependency is imported.
+
+    python benchmarks/startup.py [--runs 10] [--budget-ms 50]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# Dependencies the extension must only import on first use of a handler.
+# Those the server already loaded itself are not counted.
+LAZY_MODULES = ["openai", "httpx", "pydantic", "nbformat", "numpy"]
+
+SNIPPET = """
+import json, os, sys, tempfile
+from time import perf_counter
+import jupyter_server.serverapp, tornado.web, traitlets
+from traitlets.config import Config, LoggingConfigurable
+
+preloaded = set(sys.modules)
+start = perf_counter()
+import auto_dashboards
+imported = perf_counter()
+
+
+class StubServerApp(LoggingConfigurable):
+    port = 8888
+    root_dir = os.getcwd()
+    web_app = tornado.web.Application(base_url="/")
+
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    config = Config()
+    config.DashboardManager.state_dir = tmp_dir
+    server_app = StubServerApp(config=config)
+
+    registration_start = perf_counter()
+    auto_dashboards._load_jupyter_server_extension(server_app)
+    registered = perf_counter()
+
+print(json.dumps({
+    "import": imported - start,
+    "registration": registered - registration_start,
+    "loaded": [name for name in %r if name in sys.modules and name not in preloaded],
+}))
+""" % (LAZY_MODULES,)
+
+
+def measure() -> dict:
+    output = subprocess.check_output([sys.executable, "-c", SNIPPET])
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    results = [measure() for _ in range(args.runs)]
+    loaded = sorted({name for result in results for name in result["loaded"]})
+    stages = {
+        "import auto_dashboards": [result["import"] * 1000 for result in results],
+        "register extension": [result["registration"] * 1000 for result in results],
+        "total": [(result["import"] + result["registration"]) * 1000 for result in results],
+    }
+    for name, durations in stages.items():
+        print(f"{name}: median {statistics.median(durations):.1f} ms, "
+              f"min {min(durations):.1f} ms, max {max(durations):.1f} ms "
+              f"over {args.runs} runs")
+    median = statistics.median(stages["total"])
+
+    status = 0
+    if loaded:
+        print(f"FAIL: lazily loaded modules imported at startup: {', '.join(loaded)}")
+        status = 1
+    if median > args.budget_ms:
+        print(f"FAIL: median startup cost exceeds budget of {args.budget_ms:.1f} ms")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())